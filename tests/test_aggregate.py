@@ -0,0 +1,88 @@
+from tinystream import Stream, Stats, QuantileSketch, Count, Max, Min, Sum, Reduce, Collect, GroupBy, F
+
+
+def test_aggregate():
+    data = [{"type": "a", "value": 3}, {"type": "b", "value": 5}, {"type": "a", "value": 1}]
+    results = Stream(data).aggregate(
+        n=Count(),
+        top=Max(key=lambda x: x["value"]),
+        bottom=Min(key=F("value")),
+        groups=GroupBy(F("type"), Count()),
+        values=GroupBy(F("type")),
+    )
+    assert results["n"] == 3
+    assert results["top"].get()["value"] == 5
+    assert results["bottom"].get()["value"] == 1
+    assert results["groups"] == {"a": 2, "b": 1}
+    assert results["values"]["b"] == [data[1]]
+
+
+def test_aggregate_numbers():
+    results = Stream([4, 2, 6]).aggregate(
+        total=Sum(),
+        max=Max(),
+        min=Min(),
+        product=Reduce(lambda x, y: x * y, identity=1),
+        items=Collect(),
+        stats=Stats(),
+        sketch=QuantileSketch(),
+    )
+    assert results["total"].get() == 12
+    assert results["max"].get() == 6
+    assert results["min"].get() == 2
+    assert results["product"].get() == 48
+    assert results["items"] == [4, 2, 6]
+    assert results["stats"].mean == 4
+    assert results["sketch"].quantile(0.5).get() == 4
+
+
+def test_aggregate_empty_and_reuse():
+    total = Sum()
+    assert Stream([]).aggregate(total=total)["total"].absent
+    assert Stream([1]).aggregate(total=total)["total"].get() == 1
+    assert Stream([2]).aggregate(total=total)["total"].get() == 2
+
+
+def test_aggregate_given_collectors():
+    total = Sum()
+    assert Stream([1, 2]).aggregate(False, total=total)["total"].get() == 3
+    assert total.result().get() == 3
+
+
+def test_aggregate_resume():
+    numbers = list(range(10))
+    checkpoints = []
+    collectors = {"total": Sum(), "n": Count(), "stats": Stats()}
+
+    def fail_at_seven(x):
+        if x == 7:
+            raise RuntimeError("Preempted")
+        return x
+
+    stream = Stream.of_sequence(numbers, on_checkpoint=checkpoints.append, every=3, state=lambda: collectors)
+    try:
+        stream.map(fail_at_seven).aggregate(False, **collectors)
+    except RuntimeError:
+        pass
+
+    checkpoint = checkpoints[-1]
+    assert checkpoint.offset == 6
+    assert checkpoint.state["total"].result().get() == 15
+    assert checkpoint.state["n"].result() == 6
+
+    collectors = checkpoint.state
+    checkpoints = []
+    stream = Stream.of_sequence(numbers, resume_from=checkpoint, on_checkpoint=checkpoints.append, every=3, state=lambda: collectors)
+    results = stream.aggregate(False, **collectors)
+    assert results["total"].get() == 45
+    assert results["n"] == 10
+    assert results["stats"].mean == 4.5
+    assert [c.offset for c in checkpoints] == [9, 10]
+    assert checkpoints[-1].state["total"].result().get() == 45
+
+
+def test_aggregate_collector_named_copy():
+    collect = Collect()
+    results = Stream([1, 2]).aggregate(copy=collect, n=Count())
+    assert results == {"copy": [1, 2], "n": 2}
+    assert collect.result() == []
@@ -0,0 +1,69 @@
+import pytest
+
+from test_streams import create_json_lines, Node
+from tinystream import Stream, F, Opt
+
+
+def create_orders():
+    return [
+        {"user": {"name": "Anna", "age": 35}, "price": 2.5, "qty": 4},
+        {"user": {"name": "Bert", "age": 25}, "price": 10, "qty": 1},
+        {"user": {"name": "Carl"}, "price": 1, "qty": 3},
+    ]
+
+
+def test_filter_compare():
+    assert Stream(create_orders()).filter(F("user", "age") > 30).map(F("user", "name")).collect() == ["Anna"]
+    assert Stream(create_orders()).filter(F("user", "age") <= 30).count() == 1
+    assert Stream(create_orders()).filter(F("user", "age") != 35).count() == 1
+
+
+def test_map_arithmetic():
+    assert Stream(create_orders()).map(F("price") * F("qty")).collect() == [10, 10, 3]
+    assert Stream(create_orders()).map(F("price") * 2 + 1).collect() == [6, 21, 3]
+    assert Stream(create_orders()).map(1 - F("qty")).collect() == [-3, 0, -2]
+    assert Stream(create_orders()).map(-F("qty")).collect() == [-4, -1, -3]
+
+
+def test_map_missing():
+    assert Stream(create_orders()).map(F("user", "age") + 1).collect() == [36, 26, None]
+
+
+def test_logical():
+    orders = create_orders()
+    assert Stream(orders).filter((F("price") > 1) & (F("qty") > 1)).count() == 1
+    assert Stream(orders).filter((F("price") > 5) | (F("qty") > 3)).count() == 2
+    assert Stream(orders).filter(~(F("user", "age") > 30)).count() == 1
+    assert Stream(orders).filter(~(F("user", "age") == 35)).count() == Stream(orders).filter(F("user", "age") != 35).count()
+    assert Stream(orders).filter(~F("user", "age").exists()).map(F("user", "name")).collect() == ["Carl"]
+
+
+def test_exists_is_in():
+    assert Stream(create_orders()).filter(F("user", "age").exists()).count() == 2
+    assert Stream(create_orders()).filter(F("user", "name").is_in(["Anna", "Carl"])).count() == 2
+
+
+def test_object_attribute():
+    assert Stream([Node("A"), Node("B")]).filter(F("name") == "B").next().get().name == "B"
+
+
+def test_opt():
+    assert Opt(create_orders()[0]).map(F("user", "name")).get() == "Anna"
+    assert Opt(create_orders()[2]).filter(F("user", "age") > 30).absent
+
+
+def test_pushdown():
+    stream = Stream.of_json_lines(create_json_lines())
+    assert stream.filter((F("type") == "child") & F("address").exists()).map_key("name").collect() == ["Child B"]
+
+    stream = Stream.of_json_lines(create_json_lines())
+    assert stream.filter(F("name") == "Child A").count() == 1
+
+
+def test_no_truth_value():
+    with pytest.raises(TypeError, match="pass them to filter\\(\\) or map\\(\\)"):
+        if F("a") == 1:
+            pass
+
+    with pytest.raises(TypeError):
+        F("a") in [F("b")]
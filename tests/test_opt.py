@@ -169,3 +169,36 @@ def test_stream():
 def test_dict_map_kwargs():
     opt = Opt({"name": "First"})
     assert opt.map_kwargs(Node).get().name == "First"
+
+
+def test_filter_skips_absent():
+    called = False
+
+    def predicate(x):
+        nonlocal called
+        called = True
+        return True
+
+    assert Opt(None).filter(predicate).absent
+    assert called is False
+
+
+def test_empty_opt_shared():
+    assert Opt(None).map_key("name") is Opt({}).map_keys("a", "b")
+    assert Opt(None).map_keys("a") is Opt({"a": 1}).filter_key_value("a", 2)
+
+
+def test_map_keys_mixed():
+    data = {"items": [{"tags": ("a", "b")}], "node": Node(name="Node")}
+    opt = Opt(data)
+    assert opt.map_keys("items", 0, "tags", 1).get() == "b"
+    assert opt.map_keys("items", 1, "tags").absent
+    assert opt.map_keys("node", "name").get() == "Node"
+    assert opt.map_keys("node", "inexistent", "name").absent
+    assert opt.map_keys().get() is data
+
+
+def test_map_keys_none_value():
+    opt = Opt({"name": None})
+    assert opt.map_key("name").absent
+    assert opt.filter_key_value("name", None).present
@@ -0,0 +1,61 @@
+import pickle
+
+from test_streams import create_node_dict_list, create_json_lines, create_numeric_list
+from tinystream import Pipeline, Stream, F, LRU, TTL
+
+
+def name_length(name: str):
+    return len(name)
+
+
+def create_pipeline():
+    return Pipeline().map_keys("node", "name").filter_type(str).map(name_length)
+
+
+def test_pipeline_reuse():
+    pipeline = create_pipeline()
+    assert len(pipeline) == 3
+    assert pipeline.steps[0] == ("map_keys", ("node", "name"), {})
+    assert pipeline(create_node_dict_list()).collect() == [6, 6, 6, 6]
+    assert Stream(create_node_dict_list()).limit(2).apply(pipeline).sum().get() == 12
+
+
+def test_pipeline_fork():
+    pipeline = Pipeline().filter(lambda x: x > 2)
+    doubled = pipeline.map(lambda x: x * 2)
+    assert len(pipeline) == 1
+    assert pipeline(create_numeric_list()).collect() == [3, 5, 6]
+    assert doubled(create_numeric_list()).collect() == [6, 10, 12]
+
+
+def test_pipeline_pickle():
+    pipeline = pickle.loads(pickle.dumps(create_pipeline()))
+    assert pipeline(create_node_dict_list()).count() == 4
+
+    compiled = Pipeline().map(F("a") + 1)
+    assert compiled([{"a": 1}]).collect() == [2]
+    assert pickle.loads(pickle.dumps(compiled))([{"a": 2}]).collect() == [3]
+
+
+def test_pipeline_pushdown():
+    pipeline = Pipeline().filter_key_value("type", "child").map_key("name").limit(5)
+    assert Stream.of_json_lines(create_json_lines()).apply(pipeline).collect() == ["Child A", "Child B"]
+
+
+def test_limit_short_source():
+    assert Stream([1]).limit(2).collect() == [1]
+
+
+def test_pipeline_pickle_cache():
+    cache = LRU(maxsize=10)
+    pipeline = Pipeline().map(name_length, cache=cache)
+    assert pipeline(["a", "bb", "a"]).collect() == [1, 2, 1]
+    assert cache.stats.hits == 1
+
+    copied = pickle.loads(pickle.dumps(pipeline))
+    assert copied(["a", "a"]).collect() == [1, 1]
+    assert copied.steps[0][2]["cache"].stats.hits == 1
+    assert len(copied.steps[0][2]["cache"]) == 1
+
+    ttl = pickle.loads(pickle.dumps(TTL(seconds=10)))
+    assert ttl.get("a", lambda: 1) == 1
@@ -0,0 +1,68 @@
+import random
+import statistics
+
+from tinystream import Stream, Stats, QuantileSketch
+
+
+def test_stats():
+    numbers = [2, 4, 4, 4, 5, 5, 7, 9]
+    stats = Stream(numbers).stats()
+    assert stats.count == 8
+    assert stats.mean == 5
+    assert stats.variance == 4
+    assert stats.stddev == 2
+    assert stats.sample_variance == statistics.variance(numbers)
+    assert stats.min == 2
+    assert stats.max == 9
+
+
+def test_stats_empty():
+    stats = Stream([]).stats()
+    assert stats.count == 0
+    assert stats.min is None
+    assert stats.variance == 0
+
+
+def test_stats_merge():
+    numbers = [random.random() for _ in range(1000)]
+    merged = Stream(numbers[:300]).stats().merge(Stream(numbers[300:]).stats()).merge(Stats())
+    assert merged.count == 1000
+    assert abs(merged.mean - statistics.mean(numbers)) < 1e-9
+    assert abs(merged.variance - statistics.pvariance(numbers)) < 1e-9
+    assert merged.min == min(numbers)
+    assert Stats().merge(merged).max == max(numbers)
+
+
+def test_quantiles_exact():
+    assert Stream(list(range(1, 101))).quantiles([0, 0.5, 0.99, 1], approx=False).get() == [1, 50, 99, 100]
+    assert Stream([]).quantiles([0.5], approx=False).absent
+
+
+def test_quantiles_approx():
+    numbers = list(range(100000))
+    random.Random(1).shuffle(numbers)
+    median, p99 = Stream(numbers).quantiles([0.5, 0.99]).get()
+    assert abs(median - 50000) < 2000
+    assert abs(p99 - 99000) < 2000
+    assert Stream([]).quantiles([0.5]).absent
+
+
+def test_quantile_sketch_memory():
+    sketch = QuantileSketch(k=50, seed=1)
+    for x in range(100000):
+        sketch.add(x)
+    assert sketch.count == 100000
+    assert sketch.size <= 3 * 50 + 2 * 15
+
+
+def test_quantile_sketch_merge():
+    left = QuantileSketch(seed=1)
+    right = QuantileSketch(seed=2)
+    for x in range(50000):
+        left.add(x)
+        right.add(x + 50000)
+    merged = left.merge(right)
+    assert merged.count == 100000
+    assert abs(merged.quantile(0.5).get() - 50000) < 2000
+    assert QuantileSketch().quantile(0.5).absent
+
@@ -1,9 +1,18 @@
+import array
+import asyncio
+import sqlite3
+import operator
+import struct
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import List, Iterable
 
 import pytest
 
-from tinystream import Stream
+from tinystream import Stream, LRU, TTL, Sum, Checkpoint
 
 
 def fibonacci(*kwargs):
@@ -286,6 +295,16 @@ def test_sorted_no_key():
     assert stream.sorted(reverse=True).next().get() == 5
 
 
+def test_sorted_after_next():
+    stream = Stream((3, 5, 1))
+    assert stream.next().get() == 3
+    assert stream.sorted().collect() == [1, 5]
+
+
+def test_range():
+    assert Stream(range(5)).sum().get() == 10
+
+
 def test_flatmap_list_of_list():
     stream = Stream([create_numeric_list(), create_numeric_list(), create_numeric_list()])
     flat = stream.flatmap()
@@ -409,3 +428,473 @@ def test_call_end():
 def test_on_end_twice():
     with pytest.raises(AttributeError, match="on_end is immutable") as e:
         Stream(["a", "b", "c"]).on_end(lambda: None).on_end(lambda: None)
+
+
+def create_json_lines():
+    return [
+        '{"name": "Parent A", "type": "parent", "address": {"street": "Grove"}}',
+        '{"name": "Child A", "type": "child"}',
+        '',
+        '{"name": "Child \\u0042", "type": "child", "address": {"street": "Elm"}}',
+    ]
+
+
+def test_json_lines():
+    assert Stream.of_json_lines(create_json_lines()).count() == 3
+
+
+def test_json_lines_pushdown():
+    stream = Stream.of_json_lines(create_json_lines())
+    assert stream.filter_key_value("type", "child").map_key("name").collect() == ["Child A", "Child B"]
+
+    stream = Stream.of_json_lines(create_json_lines())
+    assert stream.filter_key_value("name", "Child B").count() == 1
+
+    stream = Stream.of_json_lines(create_json_lines())
+    assert stream.filter_key("address").map_keys("address", "street").join(",") == "Grove,Elm"
+
+    stream = Stream.of_json_lines(create_json_lines())
+    assert stream.filter_key("address", invert=True).map_key("name").next().get() == "Child A"
+
+
+def test_json_lines_filter_after_projection():
+    stream = Stream.of_json_lines(create_json_lines())
+    assert stream.map_key("address").filter_key_value("street", "Elm").count() == 1
+
+
+def test_json_lines_pushdown_after_next():
+    stream = Stream.of_json_lines(create_json_lines())
+    assert stream.next().get()["name"] == "Parent A"
+    assert stream.filter_key_value("type", "child").count() == 2
+
+
+def create_csv_lines():
+    return [
+        "name,type,age",
+        "Parent A,parent,40",
+        "Child A,child",
+        "",
+        "Child B,child,8",
+    ]
+
+
+def test_csv():
+    rows = Stream.of_csv(create_csv_lines()).collect()
+    assert len(rows) == 3
+    assert rows[1] == {"name": "Child A", "type": "child", "age": None}
+
+
+def test_csv_pushdown():
+    stream = Stream.of_csv(create_csv_lines())
+    assert stream.filter_key_value("type", "child").map_key("name").join(",") == "Child A,Child B"
+
+    stream = Stream.of_csv(create_csv_lines())
+    assert stream.filter_key("inexistent").count() == 0
+
+    stream = Stream.of_csv(create_csv_lines())
+    assert stream.filter_key("inexistent", invert=True).count() == 3
+
+    stream = Stream.of_csv(create_csv_lines())
+    assert stream.map_key("age").join(",") == "40,None,8"
+
+    stream = Stream.of_csv(create_csv_lines())
+    assert stream.map_key("inexistent").next().absent
+
+
+def test_map_cache_lru():
+    calls = []
+
+    def mapper(x: int):
+        calls.append(x)
+        return x * 2
+
+    cache = LRU(maxsize=2)
+    assert Stream([1, 2, 1, 3, 1, 2]).map(mapper, cache=cache).collect() == [2, 4, 2, 6, 2, 4]
+    assert calls == [1, 2, 3, 2]
+    assert cache.stats.hits == 2
+    assert cache.stats.misses == 4
+    assert cache.stats.evictions == 2
+    assert cache.stats.hit_rate == 2 / 6
+    assert len(cache) == 2
+
+    assert Stream([1, 2]).map(mapper, cache=cache).collect() == [2, 4]
+    assert cache.stats.hits == 4
+
+
+def test_map_cache_key():
+    cache = LRU()
+    data = create_dict_list()
+    names = Stream(data + data).map(lambda x: x["name"].upper(), cache=cache, cache_key=lambda x: x["name"]).collect()
+    assert names == ["PARENT A", "PARENT B", "PARENT A", "PARENT B"]
+    assert cache.stats.hits == 2
+
+
+def test_map_cache_ttl():
+    now = 0
+
+    cache = TTL(seconds=10, clock=lambda: now)
+    assert Stream([1, 1]).map(str, cache=cache).collect() == ["1", "1"]
+    assert cache.stats.hits == 1
+
+    now = 10
+    assert Stream([1]).map(str, cache=cache).collect() == ["1"]
+    assert cache.stats.misses == 2
+    assert cache.stats.evictions == 1
+
+
+def test_batch():
+    assert Stream(list(range(5))).batch(2).collect() == [[0, 1], [2, 3], [4]]
+    assert Stream([]).batch(2).count() == 0
+
+
+def test_for_each_batch_sqlite():
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE numbers (value INTEGER)")
+
+    def insert(items):
+        connection.executemany("INSERT INTO numbers VALUES (?)", [(x,) for x in items])
+
+    Stream(list(range(10))).for_each_batch(insert, size=3)
+    assert connection.execute("SELECT COUNT(*), SUM(value) FROM numbers").fetchone() == (10, 45)
+
+
+def test_for_each_batch_concurrent():
+    lock = threading.Lock()
+    batches = []
+    running = 0
+    max_running = 0
+
+    def flush(items):
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+            batches.append(items)
+
+    Stream(list(range(20))).for_each_batch(flush, size=2, max_in_flight=3)
+    assert len(batches) == 10
+    assert 1 < max_running <= 3
+    assert sorted(x for items in batches for x in items) == list(range(20))
+
+
+def test_for_each_batch_error():
+    def flush(items):
+        raise ValueError("Flush failed")
+
+    with pytest.raises(ValueError, match="Flush failed"):
+        Stream(list(range(10))).for_each_batch(flush, size=2, max_in_flight=2)
+
+
+def test_for_each_batch_max_in_flight():
+    with pytest.raises(ValueError, match="max_in_flight must be greater than 0"):
+        Stream([1]).for_each_batch(print, max_in_flight=0)
+
+    with pytest.raises(ValueError, match="max_in_flight must be greater than 0"):
+        asyncio.run(Stream([1]).for_each_batch_async(asyncio.sleep, max_in_flight=0))
+
+
+def test_for_each_batch_async():
+    batches = []
+    running = 0
+    max_running = 0
+
+    async def flush(items):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.001)
+        running -= 1
+        batches.append(items)
+
+    asyncio.run(Stream(list(range(7))).for_each_batch_async(flush, size=2, max_in_flight=2))
+    assert len(batches) == 4
+    assert max_running == 2
+
+
+def test_binary_record_size(tmp_path):
+    path = tmp_path / "records.bin"
+    path.write_bytes(struct.pack("<iH", 1, 2) + struct.pack("<iH", 3, 4))
+
+    records = Stream.of_binary(path, record_size=6).collect()
+    assert all(isinstance(record, memoryview) for record in records)
+    assert Stream(records).unpack("<iH").collect() == [(1, 2), (3, 4)]
+
+    with pytest.raises(ValueError, match="not a multiple"):
+        Stream.of_binary(b"12345", record_size=2).collect()
+
+
+def test_binary_empty_file(tmp_path):
+    path = tmp_path / "empty.bin"
+    path.write_bytes(b"")
+    assert Stream.of_binary(path, record_size=4).count() == 0
+
+
+def test_binary_delimiter():
+    records = Stream.of_binary(b"ab\ncd\n\nef", delimiter=b"\n").map(bytes).collect()
+    assert records == [b"ab", b"cd", b"", b"ef"]
+
+    view = memoryview(b"xab|cd")[1:]
+    assert Stream.of_binary(view, delimiter=b"|").map(bytes).collect() == [b"ab", b"cd"]
+
+
+def test_binary_length_prefix():
+    data = bytearray()
+    for payload in (b"Hallo", b"", b"Welt"):
+        data += struct.pack("<H", len(payload)) + payload
+
+    assert Stream.of_binary(data, length_prefix="<H").map(bytes).collect() == [b"Hallo", b"", b"Welt"]
+
+    with pytest.raises(ValueError, match="Incomplete record"):
+        Stream.of_binary(data[:-1], length_prefix="<H").collect()
+
+
+def test_binary_arguments():
+    with pytest.raises(ValueError, match="Exactly one"):
+        Stream.of_binary(b"", record_size=2, delimiter=b"\n")
+
+    with pytest.raises(ValueError, match="record_size must be greater than 0"):
+        Stream.of_binary(b"1234", record_size=0)
+
+    with pytest.raises(ValueError, match="record_size must be greater than 0"):
+        Stream.of_binary(b"1234", record_size=-2)
+
+    with pytest.raises(ValueError, match="delimiter must not be empty"):
+        Stream.of_binary(b"1234", delimiter=b"")
+
+
+def test_unpack_many():
+    data = struct.pack("<hhhh", 1, 2, 3, 4)
+    assert Stream.of_binary(data, record_size=4).unpack_many("<h").collect() == [(1,), (2,), (3,), (4,)]
+
+
+def test_collect_array():
+    collected = Stream([1.5, 2.5]).map(lambda x: x * 2).collect_array("d")
+    assert isinstance(collected, array.array)
+    assert collected.tolist() == [3.0, 5.0]
+    assert Stream([]).collect_array("i").tolist() == []
+
+
+def test_collect_array_after_collect():
+    stream = Stream([1, 2, 3])
+    stream.collect()
+    assert stream.collect_array("b").tolist() == [1, 2, 3]
+
+
+def test_collect_bytes():
+    assert Stream.of_binary(b"ab\ncd", delimiter=b"\n").collect_bytes() == b"abcd"
+
+
+def test_collect_bytes_memory():
+    data = bytes(range(256)) * 6250
+    tracemalloc.start()
+    try:
+        collected = Stream.of_binary(data, record_size=8).collect_bytes()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert collected == data
+    assert peak < 4 * len(data)
+
+
+def test_collect_numpy():
+    numpy = pytest.importorskip("numpy")
+    collected = Stream([1, 2, 3]).collect_numpy(numpy.int32)
+    assert collected.dtype == numpy.int32
+    assert collected.tolist() == [1, 2, 3]
+    assert Stream([1, 2, 3]).filter(lambda x: x > 1).collect_numpy().tolist() == [2.0, 3.0]
+
+
+def test_tuple_sum():
+    assert Stream((1, 2, 3, 4, 5)).sum().get() == 15
+
+
+def test_reduce_raises_reducer_errors():
+    with pytest.raises(TypeError):
+        Stream(create_mixed_list()).max()
+
+
+def test_reduce_identity():
+    assert Stream([]).reduce(lambda x, y: x + y, identity=0).get() == 0
+    assert Stream([1, 2]).reduce(lambda x, y: x + y, identity=10).get() == 13
+
+
+def test_reduce_parallel_processes():
+    numbers = list(range(1000))
+    assert Stream(numbers).reduce(operator.add, parallel=True, chunk_size=100).get() == sum(numbers)
+    assert Stream(numbers).sum(parallel=True, chunk_size=300).get() == sum(numbers)
+    assert Stream(numbers).max(parallel=True, chunk_size=300).get() == 999
+    assert Stream(numbers).min(parallel=True, chunk_size=300).get() == 0
+
+
+def test_reduce_parallel_executor():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        strings = Stream(create_string_list()).reduce(lambda x, y: x + y, parallel=True, chunk_size=1, executor=executor)
+        assert strings.get() == "XYA"
+
+        counts = Stream(create_string_list()).reduce(
+            lambda x, y: x + 1,
+            parallel=True,
+            combiner=lambda x, y: x + y,
+            identity=0,
+            chunk_size=2,
+            executor=executor,
+        )
+        assert counts.get() == 3
+        assert Stream([]).sum(parallel=True, executor=executor).absent
+
+
+def test_sample():
+    numbers = list(range(10000))
+    sample = Stream(numbers).sample(100, seed=1).collect()
+    assert len(sample) == 100
+    assert len(set(sample)) == 100
+    assert all(0 <= x < 10000 for x in sample)
+    assert sample != list(range(100))
+    assert Stream(numbers).sample(100, seed=1).collect() == sample
+
+
+def test_sample_uniform():
+    hits = [0] * 10
+    for seed in range(500):
+        for x in Stream(list(range(10))).sample(1, seed=seed):
+            hits[x] += 1
+    assert all(20 < hit < 80 for hit in hits)
+
+
+def test_sample_small():
+    assert sorted(Stream([3, 1, 2]).sample(5).collect()) == [1, 2, 3]
+    assert Stream([1, 2]).sample(0).count() == 0
+    with pytest.raises(ValueError, match="k must not be negative"):
+        Stream([1, 2]).sample(-1)
+
+    with pytest.raises(ValueError, match="p must be between 0 and 1"):
+        Stream([1, 2]).sample_fraction(2)
+
+    with pytest.raises(ValueError, match="p must be between 0 and 1"):
+        Stream([1, 2]).sample_fraction(-1)
+
+    with pytest.raises(ValueError, match="k must not be negative"):
+        Stream([1, 2]).sample_by(str, -1)
+
+
+def test_sample_fraction():
+    sample = Stream(list(range(10000))).sample_fraction(0.1, seed=1).collect()
+    assert 800 < len(sample) < 1200
+    assert sample == sorted(sample)
+    assert Stream(fibonacci()).sample_fraction(0.5, seed=1).limit(3).count() == 3
+
+
+def test_sample_by():
+    data = [{"type": "a" if x % 3 else "b", "value": x} for x in range(300)]
+    samples = Stream(data).sample_by(lambda x: x["type"], 5, seed=1)
+    assert set(samples.keys()) == {"a", "b"}
+    assert len(samples["a"]) == 5
+    assert all(x["type"] == "b" for x in samples["b"])
+
+    samples = Stream(data[:4]).sample_by(lambda x: x["type"], 5)
+    assert len(samples["a"]) == 2
+
+
+def test_of_lines(tmp_path):
+    path = tmp_path / "lines.txt"
+    path.write_bytes("eins\r\nzwei\n\ndrei\nvier".encode())
+    assert Stream.of_lines(path).collect() == ["eins", "zwei", "", "drei", "vier"]
+
+
+def test_of_lines_resume(tmp_path):
+    path = tmp_path / "lines.txt"
+    path.write_text("".join(f"{x}\n" for x in range(10)))
+    checkpoints = []
+    total = Sum()
+
+    stream = Stream.of_lines(path, on_checkpoint=checkpoints.append, every=3, state=lambda: total)
+    for line in stream.map(int):
+        total.add(line)
+        if line == 7:
+            break
+
+    # The checkpoint covers only lines processed completely before the interruption
+    checkpoint = checkpoints[-1]
+    assert checkpoint.offset == 12
+    assert checkpoint.state.result().get() == 0 + 1 + 2 + 3 + 4 + 5
+
+    total = checkpoint.state
+    checkpoints = []
+    for line in Stream.of_lines(path, resume_from=checkpoint, on_checkpoint=checkpoints.append, every=3, state=lambda: total).map(int):
+        total.add(line)
+    assert total.result().get() == 45
+    assert [c.offset for c in checkpoints] == [18, 20]
+
+
+def test_of_sequence_resume():
+    checkpoints = []
+    assert Stream.of_sequence([1, 2, 3, 4, 5], on_checkpoint=checkpoints.append, every=2).sum().get() == 15
+    assert [c.offset for c in checkpoints] == [2, 4, 5]
+    assert Stream.of_sequence([1, 2, 3, 4, 5], resume_from=checkpoints[0]).collect() == [3, 4, 5]
+    assert Stream.of_sequence([1, 2], resume_from=2).count() == 0
+
+    checkpoints = []
+    Stream.of_sequence([], on_checkpoint=checkpoints.append).collect()
+    assert checkpoints == [Checkpoint(0)]
+
+
+def test_map_keys_fused():
+    data = [{"a": {"b": 1}}, {"a": {}}, {"c": 2}, {"a": {"b": None}}]
+    assert Stream(data).map_keys("a", "b").collect() == [1, None]
+    assert Stream(data).map_keys().count() == 4
+
+
+def test_map_cache_unhashable():
+    with pytest.raises(TypeError, match="pass a cache_key function"):
+        Stream(create_dict_list()).map(len, cache=LRU()).collect()
+
+
+def test_reduce_parallel_window_keeps_order():
+    letters = [chr(ord("a") + x % 26) for x in range(500)]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        joined = Stream(letters).reduce(lambda x, y: x + y, parallel=True, chunk_size=3, executor=executor)
+    assert joined.get() == "".join(letters)
+
+
+def test_collect_numpy_preallocates(monkeypatch):
+    numpy = pytest.importorskip("numpy")
+    counts = []
+    fromiter = numpy.fromiter
+
+    def record_count(iterable, dtype, count=-1):
+        counts.append(count)
+        return fromiter(iterable, dtype=dtype, count=count)
+
+    monkeypatch.setattr(numpy, "fromiter", record_count)
+
+    assert Stream([1, 2, 3]).collect_numpy().tolist() == [1, 2, 3]
+    assert Stream((1, 2, 3)).collect_numpy().tolist() == [1, 2, 3]
+    assert Stream(range(3)).collect_numpy(int).tolist() == [0, 1, 2]
+    assert Stream(b"abc").collect_numpy(int).tolist() == [97, 98, 99]
+    assert Stream("123").collect_numpy(int).tolist() == [1, 2, 3]
+    assert Stream("\u00e9\u00e9").collect_numpy("U1").tolist() == ["\u00e9", "\u00e9"]
+    assert counts == [3, 3, 3, 3, 3, 2]
+
+    counts.clear()
+    assert Stream(fibonacci()).limit(3).collect_numpy(int).tolist() == [1, 2, 3]
+    assert Stream([1, 2, 3]).map(str).collect_numpy(int).tolist() == [1, 2, 3]
+    assert counts == [-1, -1]
+
+    counts.clear()
+    stream = Stream((1, 2, 3))
+    stream.next()
+    assert stream.collect_numpy(int).tolist() == [2, 3]
+    assert counts == [2]
+
+
+def test_map_cache_ttl_purges_expired():
+    now = 0
+    cache = TTL(seconds=5, maxsize=None, clock=lambda: now)
+    for x in range(1000):
+        now = x
+        cache.get(x, lambda: x)
+    assert len(cache) == 5
+    assert cache.stats.evictions == 995
@@ -1,6 +1,22 @@
+import array
+import asyncio
+import csv
 import functools
 import itertools
-from typing import Iterable, TypeVar, Callable, List, Dict, Tuple, Iterator, Generic, Type
+import json
+import math
+import mmap
+import operator
+import os
+import random
+import struct
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from copy import deepcopy
+from dataclasses import dataclass
+from typing import Awaitable, Iterable, Sequence, Sized, TypeVar, Callable, List, Dict, Tuple, Iterator, Generic, Type
 
 T = TypeVar("T")
 R = TypeVar("R")
@@ -17,6 +33,18 @@ Supplier = Callable[[], T]
 Key = int|str
 
 
+class _Missing:
+    def __reduce__(self):
+        # Keeps the sentinel identity when pickled to worker processes
+        return "_MISSING"
+
+    def __repr__(self):
+        return "_MISSING"
+
+
+_MISSING = _Missing()
+
+
 def _key_exists(x: any, key: Key, invert: bool = False):
     if isinstance(x, (list, tuple)):
         size = len(x)
@@ -43,6 +71,21 @@ def _get_key_value(x: any, key: Key) -> any:
         return getattr(x, key)
 
 
+def _get_key(x: any, key: Key) -> any:
+    """Returns the value of the key like _key_exists() and _get_key_value() in a single lookup or _MISSING"""
+    if isinstance(x, dict):
+        return x.get(key, _MISSING)
+    elif isinstance(x, (list, tuple)):
+        return x[key] if key < len(x) else _MISSING
+    elif _key_exists(x, key):
+        return _get_key_value(x, key)
+    else:
+        return _MISSING
+
+
+_is_present = functools.partial(operator.is_not, _MISSING)
+
+
 class Opt(Generic[T]):
     def __init__(self, value: T):
         self.__val = value
@@ -71,7 +114,7 @@ class Opt(Generic[T]):
             consumer(self.get())
 
     def filter(self, predicate: Predicate[T]):
-        if predicate(self.__val):
+        if self.present and predicate(self.__val):
             return self
         else:
             return EmptyOpt()
@@ -104,26 +147,27 @@ class Opt(Generic[T]):
             return EmptyOpt()
 
     def filter_key_value(self, key: Key, value: any):
-        if _key_exists(self.__val, key, False) and _get_key_value(self.__val, key) == value:
-            return self
-        else:
-            return EmptyOpt()
+        if self.present:
+            actual = _get_key(self.__val, key)
+            if actual is not _MISSING and actual == value:
+                return self
+        return EmptyOpt()
 
     def map_key(self, key: Key):
-        if _key_exists(self.__val, key):
-            return Opt(_get_key_value(self.__val, key))
-        else:
-            return EmptyOpt()
+        return self.map_keys(key)
 
     def kmap(self, key: Key):
         """This is an alias for map_key"""
         return self.map_key(key)
 
     def map_keys(self, *iterables):
-        inst = self
-        for key in iterables:
-            inst = inst.map_key(key)
-        return inst
+        """Maps the keys in a single traversal, which ends at the first missing key"""
+        if self.absent:
+            return EmptyOpt()
+        value = _project_keys(self.__val, iterables)
+        if value is _MISSING or value is None:
+            return EmptyOpt()
+        return Opt(value)
 
     def stream(self):
         return Stream(self.__val)
@@ -140,6 +184,14 @@ class Opt(Generic[T]):
 
 
 class EmptyOpt(Opt[None]):
+    __instance: "EmptyOpt" = None
+
+    def __new__(cls):
+        # Empty Opts are immutable and shared to avoid allocations on absent paths
+        if cls.__instance is None:
+            cls.__instance = super().__new__(cls)
+        return cls.__instance
+
     def __init__(self):
         super().__init__(None)
 
@@ -152,6 +204,9 @@ class EmptyOpt(Opt[None]):
     def map_key(self, key: Key):
         return self
 
+    def map_keys(self, *iterables):
+        return self
+
     def filter_key(self, key: Key, invert: bool = False):
         return self
 
@@ -170,10 +225,863 @@ class EmptyOpt(Opt[None]):
         return 0
 
 
+def _project_keys(x: any, keys: Iterable[Key]) -> any:
+    for key in keys:
+        x = _get_key(x, key)
+        if x is _MISSING:
+            return _MISSING
+    return x
+
+
+def _matches_filter(x: any, key: Key, value: any = _MISSING, invert: bool = False) -> bool:
+    if value is _MISSING:
+        return _key_exists(x, key, invert)
+    else:
+        return _key_exists(x, key, False) and _get_key_value(x, key) == value
+
+
+class _PushdownSource(Iterator[T]):
+    """
+    Base for structured sources that accept leading filter_key(), filter_key_value()
+    and map_key() operations, so that records can be skipped or projected while reading.
+    """
+    def __init__(self, lines: Iterable[str]):
+        self._lines = lines
+        self._filters: List[Tuple[Key, any, bool]] = []
+        self._keys: List[Key] = []
+        self._iterator: Iterator[T] = None
+
+    def __next__(self) -> T:
+        if self._iterator is None:
+            self._iterator = self._read()
+        return next(self._iterator)
+
+    def __copy(self):
+        source = object.__new__(type(self))
+        source.__dict__.update(self.__dict__)
+        source._filters = self._filters.copy()
+        source._keys = self._keys.copy()
+        return source
+
+    def push_filter(self, key: Key, value: any = _MISSING, invert: bool = False) -> "_PushdownSource[T] | None":
+        """Returns a new source with the given filter applied or None if it cannot be pushed down"""
+        if self._iterator is not None or len(self._keys) > 0:
+            return None
+        source = self.__copy()
+        source._filters.append((key, value, invert))
+        return source
+
+    def push_map_key(self, key: Key) -> "_PushdownSource | None":
+        """Returns a new source projecting the given key or None if it cannot be pushed down"""
+        if self._iterator is not None:
+            return None
+        source = self.__copy()
+        source._keys.append(key)
+        return source
+
+    def _read(self) -> Iterator[T]:
+        raise NotImplementedError()
+
+
+class _JsonLinesSource(_PushdownSource[T]):
+    def __raw_tokens(self) -> List[str]:
+        # Tokens that must be contained in the raw line of a matching record
+        # as long as the line contains no escape sequences
+        tokens = []
+        for key, value, invert in self._filters:
+            if invert or not isinstance(key, str):
+                continue
+            tokens.append(json.dumps(key, ensure_ascii=False))
+            if isinstance(value, str):
+                tokens.append(json.dumps(value, ensure_ascii=False))
+        return tokens
+
+    def _read(self) -> Iterator[T]:
+        tokens = self.__raw_tokens()
+        for line in self._lines:
+            if isinstance(line, bytes):
+                line = line.decode()
+            if not line.strip():
+                continue
+            if tokens and "\\" not in line and not all(token in line for token in tokens):
+                continue
+
+            record = json.loads(line)
+            if not all(_matches_filter(record, *f) for f in self._filters):
+                continue
+            value = _project_keys(record, self._keys)
+            if value is not _MISSING:
+                yield value
+
+
+class _CsvSource(_PushdownSource[T]):
+    def __init__(self, lines: Iterable[str], **kwargs):
+        super().__init__(lines)
+        self._kwargs = kwargs
+
+    def _read(self) -> Iterator[T]:
+        reader = csv.reader(self._lines, **self._kwargs)
+        header = next(reader, None)
+        if header is None:
+            return
+        size = len(header)
+        index = {name: i for i, name in enumerate(header)}
+
+        def __column(row: List[str], i: int):
+            return row[i] if i < len(row) else None
+
+        filters = []
+        for key, value, invert in self._filters:
+            exists = key in index
+            if value is _MISSING:
+                if exists == invert:
+                    return
+            elif not exists:
+                return
+            else:
+                filters.append((index[key], value))
+
+        keys = self._keys
+        column = None
+        if len(keys) > 0:
+            if keys[0] not in index:
+                return
+            column = index[keys[0]]
+            keys = keys[1:]
+
+        for row in reader:
+            if not row:
+                continue
+            if not all(__column(row, i) == value for i, value in filters):
+                continue
+            if column is not None:
+                value = _project_keys(__column(row, column), keys)
+                if value is not _MISSING:
+                    yield value
+            else:
+                record = dict(zip(header, row))
+                if len(row) < size:
+                    record.update((name, None) for name in header[len(row):])
+                elif len(row) > size:
+                    record[None] = row[size:]
+                yield record
+
+
+class Expr(Generic[R]):
+    """
+    Base of field expressions built with F.
+    Expressions are compiled once into plain functions when used as mapper or predicate.
+    """
+    def __init__(self):
+        self.__compiled: Callable[[any], any] = None
+
+    def _compile(self) -> Callable[[any], any]:
+        """Returns a function evaluating the expression, which returns _MISSING for missing keys"""
+        raise NotImplementedError()
+
+    def _pushdown(self, source: _PushdownSource) -> _PushdownSource | None:
+        return None
+
+    def compile(self) -> Callable[[any], R]:
+        """Returns a function evaluating the expression, which returns None for missing keys"""
+        if self.__compiled is None:
+            evaluate = self._compile()
+
+            def __value(x: any):
+                value = evaluate(x)
+                return None if value is _MISSING else value
+
+            self.__compiled = __value
+        return self.__compiled
+
+    def __call__(self, x: any) -> R:
+        return self.compile()(x)
+
+    def __getstate__(self):
+        # Compiled functions are closures and recompiled after unpickling
+        state = self.__dict__.copy()
+        state["_Expr__compiled"] = None
+        return state
+
+    def __binary(self, op: Callable[[any, any], any], other: any, reverse: bool = False) -> "Expr":
+        if reverse:
+            return _BinaryExpr(op, other, self)
+        return _BinaryExpr(op, self, other)
+
+    def __eq__(self, other) -> "Expr[bool]":
+        return self.__binary(operator.eq, other)
+
+    def __ne__(self, other) -> "Expr[bool]":
+        return self.__binary(operator.ne, other)
+
+    def __lt__(self, other) -> "Expr[bool]":
+        return self.__binary(operator.lt, other)
+
+    def __le__(self, other) -> "Expr[bool]":
+        return self.__binary(operator.le, other)
+
+    def __gt__(self, other) -> "Expr[bool]":
+        return self.__binary(operator.gt, other)
+
+    def __ge__(self, other) -> "Expr[bool]":
+        return self.__binary(operator.ge, other)
+
+    def __add__(self, other) -> "Expr":
+        return self.__binary(operator.add, other)
+
+    def __radd__(self, other) -> "Expr":
+        return self.__binary(operator.add, other, True)
+
+    def __sub__(self, other) -> "Expr":
+        return self.__binary(operator.sub, other)
+
+    def __rsub__(self, other) -> "Expr":
+        return self.__binary(operator.sub, other, True)
+
+    def __mul__(self, other) -> "Expr":
+        return self.__binary(operator.mul, other)
+
+    def __rmul__(self, other) -> "Expr":
+        return self.__binary(operator.mul, other, True)
+
+    def __truediv__(self, other) -> "Expr":
+        return self.__binary(operator.truediv, other)
+
+    def __rtruediv__(self, other) -> "Expr":
+        return self.__binary(operator.truediv, other, True)
+
+    def __floordiv__(self, other) -> "Expr":
+        return self.__binary(operator.floordiv, other)
+
+    def __mod__(self, other) -> "Expr":
+        return self.__binary(operator.mod, other)
+
+    def __neg__(self) -> "Expr":
+        return _BinaryExpr(operator.sub, 0, self)
+
+    def __and__(self, other: "Expr") -> "Expr[bool]":
+        return _LogicalExpr(True, self, other)
+
+    def __or__(self, other: "Expr") -> "Expr[bool]":
+        return _LogicalExpr(False, self, other)
+
+    def __invert__(self) -> "Expr[bool]":
+        return _NotExpr(self)
+
+    __hash__ = None
+
+    def __bool__(self):
+        raise TypeError("Expressions have no truth value, pass them to filter() or map() instead")
+
+    def is_in(self, values: Iterable) -> "Expr[bool]":
+        return _BinaryExpr(operator.contains, set(values), self)
+
+    def exists(self) -> "Expr[bool]":
+        return _ExistsExpr(self)
+
+
+def _compile_operand(operand: any) -> Callable[[any], any]:
+    if isinstance(operand, Expr):
+        return operand._compile()
+    else:
+        return lambda x: operand
+
+
+class F(Expr[any]):
+    """
+    Field expression accessing the given keys like map_keys().
+    Example: Stream(data).filter(F("user", "age") > 30)
+    """
+    def __init__(self, *keys: Key):
+        super().__init__()
+        self.__keys = keys
+
+    @property
+    def keys(self) -> Tuple[Key, ...]:
+        return self.__keys
+
+    def _compile(self) -> Callable[[any], any]:
+        keys = self.__keys
+        if len(keys) == 1:
+            key = keys[0]
+            return lambda x: _get_key(x, key)
+        return lambda x: _project_keys(x, keys)
+
+
+class _BinaryExpr(Expr[any]):
+    def __init__(self, op: Callable[[any, any], any], left: any, right: any):
+        super().__init__()
+        self.__op = op
+        self.__left = left
+        self.__right = right
+
+    def _compile(self) -> Callable[[any], any]:
+        op = self.__op
+        left = _compile_operand(self.__left)
+        if not isinstance(self.__right, Expr):
+            right_value = self.__right
+
+            def __eval_value(x: any):
+                value = left(x)
+                return _MISSING if value is _MISSING else op(value, right_value)
+
+            return __eval_value
+
+        right = _compile_operand(self.__right)
+
+        def __eval(x: any):
+            left_value = left(x)
+            if left_value is _MISSING:
+                return _MISSING
+            right_value = right(x)
+            if right_value is _MISSING:
+                return _MISSING
+            return op(left_value, right_value)
+
+        return __eval
+
+    def _pushdown(self, source: _PushdownSource) -> _PushdownSource | None:
+        if (
+            self.__op is operator.eq
+            and isinstance(self.__left, F)
+            and len(self.__left.keys) == 1
+            and not isinstance(self.__right, Expr)
+        ):
+            return source.push_filter(self.__left.keys[0], self.__right)
+        return None
+
+
+class _LogicalExpr(Expr[bool]):
+    def __init__(self, conjunction: bool, left: Expr, right: Expr):
+        super().__init__()
+        self.__conjunction = conjunction
+        self.__left = left
+        self.__right = right
+
+    def _compile(self) -> Callable[[any], bool]:
+        left = _compile_operand(self.__left)
+        right = _compile_operand(self.__right)
+
+        def __truthy(value: any):
+            return value is not _MISSING and bool(value)
+
+        if self.__conjunction:
+            return lambda x: __truthy(left(x)) and __truthy(right(x))
+        else:
+            return lambda x: __truthy(left(x)) or __truthy(right(x))
+
+    def _pushdown(self, source: _PushdownSource) -> _PushdownSource | None:
+        if self.__conjunction and isinstance(self.__left, Expr) and isinstance(self.__right, Expr):
+            source = self.__left._pushdown(source)
+            if source is not None:
+                return self.__right._pushdown(source)
+        return None
+
+
+class _NotExpr(Expr[bool]):
+    def __init__(self, expr: Expr):
+        super().__init__()
+        self.__expr = expr
+
+    def _compile(self) -> Callable[[any], bool]:
+        evaluate = self.__expr._compile()
+
+        def __not(x: any):
+            value = evaluate(x)
+            return _MISSING if value is _MISSING else not value
+
+        return __not
+
+
+class _ExistsExpr(Expr[bool]):
+    def __init__(self, expr: Expr):
+        super().__init__()
+        self.__expr = expr
+
+    def _compile(self) -> Callable[[any], bool]:
+        evaluate = self.__expr._compile()
+        return lambda x: evaluate(x) is not _MISSING
+
+    def _pushdown(self, source: _PushdownSource) -> _PushdownSource | None:
+        if isinstance(self.__expr, F) and len(self.__expr.keys) == 1:
+            return source.push_filter(self.__expr.keys[0])
+        return None
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+
+class Cache(Generic[K, T]):
+    """
+    Base of bounded caches for memoizing Stream.map().
+    Instances are thread safe and can be shared across streams.
+    """
+    def __init__(self, maxsize: int | None = 128):
+        self._maxsize = maxsize
+        self._items: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getstate__(self):
+        # Pickled caches, like in Pipelines shipped to worker processes, start empty with a new lock
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_items"] = OrderedDict()
+        state["stats"] = CacheStats()
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _lookup(self, key: K) -> any:
+        """Returns the cached value or _MISSING, while holding the lock"""
+        raise NotImplementedError()
+
+    def _store(self, key: K, value: T):
+        """Stores the value, while holding the lock"""
+        raise NotImplementedError()
+
+    def get(self, key: K, supplier: Callable[[], T]) -> T:
+        with self._lock:
+            try:
+                value = self._lookup(key)
+            except TypeError as e:
+                raise TypeError(
+                    f"Cache key of type {type(key).__name__} is not hashable, pass a cache_key function to map()"
+                ) from e
+            if value is not _MISSING:
+                self.stats.hits += 1
+                return value
+            self.stats.misses += 1
+
+        value = supplier()
+        with self._lock:
+            self._store(key, value)
+            while self._maxsize is not None and len(self._items) > self._maxsize:
+                self._items.popitem(last=False)
+                self.stats.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class LRU(Cache[K, T]):
+    """Evicts the least recently used entries when maxsize is exceeded"""
+    def _lookup(self, key: K) -> any:
+        value = self._items.get(key, _MISSING)
+        if value is not _MISSING:
+            self._items.move_to_end(key)
+        return value
+
+    def _store(self, key: K, value: T):
+        self._items[key] = value
+        self._items.move_to_end(key)
+
+
+class TTL(Cache[K, T]):
+    """Expires entries after the given seconds and evicts the oldest entries when maxsize is exceeded"""
+    def __init__(self, seconds: float, maxsize: int | None = 128, clock: Callable[[], float] = time.monotonic):
+        super().__init__(maxsize)
+        self._seconds = seconds
+        self._clock = clock
+
+    def _lookup(self, key: K) -> any:
+        entry = self._items.get(key)
+        if entry is None:
+            return _MISSING
+        expires, value = entry
+        if expires <= self._clock():
+            del self._items[key]
+            self.stats.evictions += 1
+            return _MISSING
+        return value
+
+    def _store(self, key: K, value: T):
+        now = self._clock()
+        # All entries live equally long, so the oldest entries expire first
+        while self._items:
+            oldest = next(iter(self._items.values()))
+            if oldest[0] > now:
+                break
+            self._items.popitem(last=False)
+            self.stats.evictions += 1
+        self._items.pop(key, None)
+        self._items[key] = (now + self._seconds, value)
+
+
+def _open_buffer(source: str | os.PathLike | bytes | bytearray | memoryview | mmap.mmap) -> memoryview:
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return memoryview(b"")
+            # The mapping stays valid after closing the file and is released with the last view
+            return memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+    return memoryview(source).cast("B")
+
+
+def _read_binary(
+    view: memoryview,
+    record_size: int = None,
+    delimiter: bytes = None,
+    length_prefix: str = None,
+) -> Iterator[memoryview]:
+    size = len(view)
+    if record_size is not None:
+        if size % record_size != 0:
+            raise ValueError(f"Buffer size {size} is not a multiple of record size {record_size}")
+        for offset in range(0, size, record_size):
+            yield view[offset:offset + record_size]
+
+    elif delimiter is not None:
+        searchable = view.obj
+        if not isinstance(searchable, (bytes, bytearray, mmap.mmap)) or len(searchable) != size:
+            searchable = view.tobytes()
+        offset = 0
+        while offset < size:
+            end = searchable.find(delimiter, offset)
+            if end < 0:
+                end = size
+            yield view[offset:end]
+            offset = end + len(delimiter)
+
+    else:
+        prefix = struct.Struct(length_prefix)
+        offset = 0
+        while offset < size:
+            length, = prefix.unpack_from(view, offset)
+            offset += prefix.size
+            if offset + length > size:
+                raise ValueError(f"Incomplete record at offset {offset}")
+            yield view[offset:offset + length]
+            offset += length
+
+
+def _add(x, y):
+    return x + y
+
+
+def _max(x, y):
+    return x if x > y else y
+
+
+def _min(x, y):
+    return x if x < y else y
+
+
+def _reduce_chunk(cb: Reducer, identity: any, chunk: List[T]) -> R:
+    if identity is _MISSING:
+        return functools.reduce(cb, chunk)
+    return functools.reduce(cb, chunk, identity)
+
+
+class Collector(Generic[T, R]):
+    """
+    Base of collectors for Stream.aggregate(), which receive every item by add()
+    and are copied before use, so that instances can be reused as templates.
+    """
+    def add(self, x: T):
+        raise NotImplementedError()
+
+    def result(self) -> R:
+        return self
+
+
+class Count(Collector[T, int]):
+    def __init__(self):
+        self.__count = 0
+
+    def add(self, x: T):
+        self.__count += 1
+
+    def result(self) -> int:
+        return self.__count
+
+
+class Reduce(Collector[T, Opt[R]]):
+    def __init__(self, cb: Reducer, identity: any = _MISSING):
+        self.__cb = cb
+        self.__value = identity
+
+    def add(self, x: T):
+        if self.__value is _MISSING:
+            self.__value = x
+        else:
+            self.__value = self.__cb(self.__value, x)
+
+    def result(self) -> Opt[R]:
+        return EmptyOpt() if self.__value is _MISSING else Opt(self.__value)
+
+
+class Sum(Reduce[T, T]):
+    def __init__(self):
+        super().__init__(_add)
+
+
+class Max(Reduce[T, T]):
+    def __init__(self, key: Callable[[T], any] = None):
+        if key is None:
+            super().__init__(_max)
+        else:
+            super().__init__(lambda x, y: x if key(x) >= key(y) else y)
+
+
+class Min(Reduce[T, T]):
+    def __init__(self, key: Callable[[T], any] = None):
+        if key is None:
+            super().__init__(_min)
+        else:
+            super().__init__(lambda x, y: x if key(x) <= key(y) else y)
+
+
+class Collect(Collector[T, List[T]]):
+    def __init__(self):
+        self.__items: List[T] = []
+
+    def add(self, x: T):
+        self.__items.append(x)
+
+    def result(self) -> List[T]:
+        return self.__items
+
+
+class GroupBy(Collector[T, Dict[K, R]]):
+    """Passes the items to a copy of the collector per key, which defaults to Collect()"""
+    def __init__(self, key: Callable[[T], K], collector: Collector[T, R] = None):
+        if isinstance(key, Expr):
+            key = key.compile()
+        self.__key = key
+        self.__collector = collector or Collect()
+        self.__groups: Dict[K, Collector[T, R]] = {}
+
+    def add(self, x: T):
+        group = self.__key(x)
+        collector = self.__groups.get(group)
+        if collector is None:
+            collector = deepcopy(self.__collector)
+            self.__groups[group] = collector
+        collector.add(x)
+
+    def result(self) -> Dict[K, R]:
+        return {group: collector.result() for group, collector in self.__groups.items()}
+
+
+class Stats(Collector[any, "Stats"]):
+    """One-pass count, mean, variance, min and max using Welford's algorithm, mergeable across shards"""
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.min = None
+        self.max = None
+        self.__m2 = 0.0
+
+    def add(self, x: any) -> "Stats":
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.__m2 += delta * (x - self.mean)
+        if self.min is None or x < self.min:
+            self.min = x
+        if self.max is None or x > self.max:
+            self.max = x
+        return self
+
+    def merge(self, other: "Stats") -> "Stats":
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.__m2 = other.count, other.mean, other.__m2
+            self.min, self.max = other.min, other.max
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.__m2 += other.__m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = _min(self.min, other.min)
+        self.max = _max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self) -> float:
+        """Population variance"""
+        return self.__m2 / self.count if self.count > 0 else 0.0
+
+    @property
+    def sample_variance(self) -> float:
+        return self.__m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+
+    def __repr__(self):
+        return f"Stats(count={self.count}, mean={self.mean}, variance={self.variance}, min={self.min}, max={self.max})"
+
+
+class QuantileSketch(Collector[T, "QuantileSketch[T]"]):
+    """
+    Mergeable approximate quantile sketch in the style of KLL.
+    The top level keeps up to k items and each lower level about 2/3 of the level above.
+    Levels over capacity are compacted by keeping every other sorted item with doubled weight,
+    so the sketch retains at most about 3k items regardless of the number of items.
+    """
+    def __init__(self, k: int = 200, seed: int = None):
+        if k < 2:
+            raise ValueError("k must be greater than 1")
+        self.count = 0
+        self.__k = k
+        self.__levels: List[List[T]] = [[]]
+        self.__size = 0
+        self.__max_size = self.__level_capacity(0)
+        self.__random = random.Random(seed)
+
+    @property
+    def size(self) -> int:
+        """Number of retained items"""
+        return self.__size
+
+    def __level_capacity(self, height: int) -> int:
+        depth = len(self.__levels) - height - 1
+        return max(2, math.ceil(self.__k * (2 / 3) ** depth))
+
+    def add(self, x: T) -> "QuantileSketch[T]":
+        self.count += 1
+        self.__levels[0].append(x)
+        self.__size += 1
+        if self.__size >= self.__max_size:
+            self.__compact()
+        return self
+
+    def merge(self, other: "QuantileSketch[T]") -> "QuantileSketch[T]":
+        self.count += other.count
+        for height, items in enumerate(other.__levels):
+            if height == len(self.__levels):
+                self.__levels.append([])
+            self.__levels[height].extend(items)
+        self.__size += other.__size
+        self.__max_size = sum(self.__level_capacity(height) for height in range(len(self.__levels)))
+        self.__compact()
+        return self
+
+    def __compact(self):
+        while self.__size >= self.__max_size:
+            height = next(
+                height for height, items in enumerate(self.__levels)
+                if len(items) >= self.__level_capacity(height)
+            )
+            if height + 1 == len(self.__levels):
+                self.__levels.append([])
+                self.__max_size = sum(self.__level_capacity(height) for height in range(len(self.__levels)))
+            items = self.__levels[height]
+            items.sort()
+            # An odd item stays at its level to keep the total weight exact
+            kept = [items.pop()] if len(items) % 2 == 1 else []
+            promoted = items[self.__random.randint(0, 1)::2]
+            self.__levels[height + 1].extend(promoted)
+            self.__levels[height] = kept
+            self.__size -= len(items) - len(promoted)
+
+    def quantile(self, q: float) -> Opt[T]:
+        return Opt(self.quantiles([q])[0]) if self.count > 0 else EmptyOpt()
+
+    def quantiles(self, qs: Iterable[float]) -> List[T]:
+        weighted = sorted(
+            ((x, 1 << height) for height, items in enumerate(self.__levels) for x in items),
+            key=lambda item: item[0],
+        )
+        if not weighted:
+            return [None for _ in qs]
+        total = sum(weight for _, weight in weighted)
+        results = []
+        for q in qs:
+            target = q * total
+            cumulative = 0
+            result = weighted[-1][0]
+            for x, weight in weighted:
+                cumulative += weight
+                if cumulative >= target:
+                    result = x
+                    break
+            results.append(result)
+        return results
+
+
+@dataclass
+class Checkpoint:
+    """Position of a resumable source, a byte offset for files or an item index for sequences, with optional state"""
+    offset: int = 0
+    state: any = None
+
+
+def _checkpointed(
+    items: Iterator[Tuple[int, T]],
+    offset: int,
+    on_checkpoint: Callable[[Checkpoint], None] = None,
+    every: int = 1000,
+    state: Supplier = None,
+) -> Iterator[T]:
+    """
+    Yields the items of (offset after item, item) tuples. A checkpoint is emitted when the next item is requested,
+    so that all previous items have passed the downstream stages, and once at the end.
+    """
+    def __emit():
+        on_checkpoint(Checkpoint(offset, deepcopy(state()) if state else None))
+
+    count = 0
+    for next_offset, item in items:
+        yield item
+        offset = next_offset
+        count += 1
+        if on_checkpoint and count % every == 0:
+            __emit()
+    if on_checkpoint and (count == 0 or count % every != 0):
+        __emit()
+
+
+def _resume_offset(resume_from: Checkpoint | int | None) -> int:
+    if resume_from is None:
+        return 0
+    elif isinstance(resume_from, Checkpoint):
+        return resume_from.offset
+    return resume_from
+
+
+_SIZED_ITERATORS = (
+    type(iter([])),
+    type(iter(())),
+    type(iter(range(0))),
+    type(iter(b"")),
+    type(iter(bytearray())),
+    type(iter("")),
+    type(iter("\u00e9")),
+    type(iter({}.items())),
+)
+
+
 class Stream(Iterator[T]):
 
     def __init__(self, iterable: Iterable[T]):
         self.__iterable = self.__normalize_iterator(iterable)
+        # Sized collections like tuples are kept, so that they can be sorted repeatedly
+        if isinstance(iterable, Sized) and not isinstance(iterable, (Iterator, list, dict, str)):
+            self.__sequence = iterable
+        else:
+            self.__sequence = None
         self.__collected: List[T] = None
         self.__on_end: Callable = None
 
@@ -185,6 +1093,83 @@ class Stream(Iterator[T]):
     def of_many(*iterables):
         return Stream([]).concat(*iterables)
 
+    @staticmethod
+    def of_binary(
+        source: str | os.PathLike | bytes | bytearray | memoryview | mmap.mmap,
+        record_size: int = None,
+        delimiter: bytes = None,
+        length_prefix: str = None,
+    ) -> "Stream[memoryview]":
+        """
+        Streams the records of a file or bytes-like object as memoryview slices without copying.
+        Files are memory mapped. Records are split by a fixed record_size, a delimiter
+        or a length_prefix in struct format like "<I".
+        """
+        if sum(x is not None for x in (record_size, delimiter, length_prefix)) != 1:
+            raise ValueError("Exactly one of record_size, delimiter or length_prefix is required")
+        if record_size is not None and record_size < 1:
+            raise ValueError("record_size must be greater than 0")
+        if delimiter is not None and len(delimiter) == 0:
+            raise ValueError("delimiter must not be empty")
+        view = _open_buffer(source)
+        return Stream[memoryview](_read_binary(view, record_size, delimiter, length_prefix))
+
+    @staticmethod
+    def of_lines(
+        path: str | os.PathLike,
+        encoding: str = "utf-8",
+        resume_from: Checkpoint | int = None,
+        on_checkpoint: Callable[[Checkpoint], None] = None,
+        every: int = 1000,
+        state: Supplier = None,
+    ) -> "Stream[str]":
+        """
+        Streams the lines of a file without line endings, starting at the byte offset of resume_from.
+        Every given number of lines, on_checkpoint receives a Checkpoint of the byte offset
+        and a copy of the state supplied by state, like running aggregations.
+        """
+        def __read(offset: int):
+            with open(path, "rb") as file:
+                file.seek(offset)
+                for line in file:
+                    offset += len(line)
+                    yield offset, line.decode(encoding).removesuffix("\n").removesuffix("\r")
+
+        offset = _resume_offset(resume_from)
+        return Stream[str](_checkpointed(__read(offset), offset, on_checkpoint, every, state))
+
+    @staticmethod
+    def of_sequence(
+        sequence: Sequence[T],
+        resume_from: Checkpoint | int = None,
+        on_checkpoint: Callable[[Checkpoint], None] = None,
+        every: int = 1000,
+        state: Supplier = None,
+    ) -> "Stream[T]":
+        """Like of_lines() for the items of a sequence, using the item index as offset"""
+        def __read(offset: int):
+            for index in range(offset, len(sequence)):
+                yield index + 1, sequence[index]
+
+        offset = _resume_offset(resume_from)
+        return Stream[T](_checkpointed(__read(offset), offset, on_checkpoint, every, state))
+
+    @staticmethod
+    def of_json_lines(lines: Iterable[str | bytes]) -> "Stream[any]":
+        """
+        Streams the decoded records of JSON lines.
+        Leading filter_key(), filter_key_value() and map_key() operations are pushed down into the reader.
+        """
+        return Stream(_JsonLinesSource(lines))
+
+    @staticmethod
+    def of_csv(lines: Iterable[str], **kwargs) -> "Stream[Dict[str, str]]":
+        """
+        Streams the rows of CSV lines as dictionaries like csv.DictReader.
+        Leading filter_key(), filter_key_value() and map_key() operations are pushed down into the reader.
+        """
+        return Stream(_CsvSource(lines, **kwargs))
+
     def on_end(self, cb: Callable) -> "Stream[R]":
         if self.__on_end:
             raise AttributeError("on_end is immutable")
@@ -208,33 +1193,66 @@ class Stream(Iterator[T]):
         return self
 
     def __normalize_iterator(self, iterable: Iterable[T]) -> Iterable[T]:
-        if isinstance(iterable, list):
-            return iter(iterable)
-        elif isinstance(iterable, dict):
+        if isinstance(iterable, dict):
             return iter(iterable.items())
-        elif isinstance(iterable, str):
-            return iter(iterable)
         else:
-            return iterable
+            return iter(iterable)
 
-    def map(self, mapper: Mapper[T, R]):
+    def map(self, mapper: Mapper[T, R], cache: Cache = None, cache_key: Callable[[T], any] = None):
+        """
+        Maps all items. Pass a cache like LRU() or TTL() to compute the mapper only once per cache_key,
+        which defaults to the item itself and is required for unhashable items like dicts.
+        """
+        if isinstance(mapper, Expr):
+            mapper = mapper.compile()
+        if cache is not None:
+            mapper = self.__memoize(mapper, cache, cache_key)
         return Stream[R](map(mapper, self))
 
+    @staticmethod
+    def __memoize(mapper: Mapper[T, R], cache: Cache, cache_key: Callable[[T], any] = None) -> Callable[[T], R]:
+        if cache_key is None:
+            return lambda x: cache.get(x, lambda: mapper(x))
+        else:
+            return lambda x: cache.get(cache_key(x), lambda: mapper(x))
+
     def map_kwargs(self, mapper: Type[R]) -> "Stream[R]":
         return self.map(lambda x: mapper(**x))
 
+    def unpack(self, format: str | struct.Struct) -> "Stream[Tuple]":
+        """Unpacks the fields of bytes-like items with a precompiled struct format"""
+        if not isinstance(format, struct.Struct):
+            format = struct.Struct(format)
+        return Stream[Tuple](map(format.unpack_from, self))
+
+    def unpack_many(self, format: str | struct.Struct) -> "Stream[Tuple]":
+        """Unpacks all consecutive records of the given struct format from each bytes-like item in bulk"""
+        if not isinstance(format, struct.Struct):
+            format = struct.Struct(format)
+        return self.flatmap(format.iter_unpack)
+
+    def __pushdown(self, push: Callable[[_PushdownSource], _PushdownSource | None]) -> "Stream | None":
+        if self.__on_end is None and isinstance(self.__iterable, _PushdownSource):
+            source = push(self.__iterable)
+            if source is not None:
+                return Stream(source)
+        return None
+
     def map_key(self, key: Key):
-        return self.filter_key(key).map(lambda x: _get_key_value(x, key))
+        return self.map_keys(key)
 
     def kmap(self, key: Key):
         """This is an alias for map_key"""
         return self.map_key(key)
 
     def map_keys(self, *iterables):
-        inst = self
-        for key in iterables:
-            inst = inst.map_key(key)
-        return inst
+        """Maps the keys of each item in a single stage, skipping items with missing keys"""
+        if not iterables:
+            return self
+        pushed = self.__pushdown(lambda source: source.push_map_key(iterables[0]))
+        if pushed is not None:
+            return pushed.map_keys(*iterables[1:])
+        return Stream(filter(_is_present, map(lambda x: _project_keys(x, iterables), self)))
 
     def type(self, typehint: Type[R]) -> "Stream[R]":
         return self
@@ -243,12 +1261,23 @@ class Stream(Iterator[T]):
         return self.filter(lambda x: isinstance(x, typehint))
 
     def filter(self, predicate: Predicate[T]):
+        if isinstance(predicate, Expr):
+            pushed = self.__pushdown(predicate._pushdown)
+            if pushed is not None:
+                return pushed
+            predicate = predicate.compile()
         return Stream[T](filter(predicate, self.__iterable))
 
     def filter_key(self, key: Key, invert: bool = False):
+        pushed = self.__pushdown(lambda source: source.push_filter(key, invert=invert))
+        if pushed is not None:
+            return pushed
         return self.filter(lambda x: _key_exists(x, key, invert))
 
     def filter_key_value(self, key: Key, value: any):
+        pushed = self.__pushdown(lambda source: source.push_filter(key, value))
+        if pushed is not None:
+            return pushed
         return self.filter(lambda x: _key_exists(x, key, False) and _get_key_value(x, key) == value)
 
     def flatmap(self, mapper: FlatMapper[T, R] = None):
@@ -271,13 +1300,18 @@ class Stream(Iterator[T]):
 
         return Stream[T](map(__peek, self))
 
+    def __sortable(self) -> Iterable[T]:
+        if self.__sequence is not None and operator.length_hint(self.__iterable) == len(self.__sequence):
+            return self.__sequence
+        return self.__iterable
+
     def sort(self, compare: Comparator[T], reverse: bool = False):
         key = functools.cmp_to_key(compare)
-        sort = sorted(self.__iterable, key=key, reverse=reverse)
+        sort = sorted(self.__sortable(), key=key, reverse=reverse)
         return Stream[T](sort)
 
     def sorted(self, key: any = None, reverse: bool = False):
-        sort = sorted(self.__iterable, key=key, reverse=reverse)
+        sort = sorted(self.__sortable(), key=key, reverse=reverse)
         return Stream[T](sort)
 
     def next(self) -> Opt[T]:
@@ -293,6 +1327,41 @@ class Stream(Iterator[T]):
             self.__collected = list(self)
         return self.__collected
 
+    def __size(self) -> int:
+        """Returns the exact number of remaining items if known or -1"""
+        if self.__collected is not None:
+            return len(self.__collected)
+        if type(self.__iterable) in _SIZED_ITERATORS:
+            return operator.length_hint(self.__iterable)
+        return -1
+
+    def collect_array(self, typecode: str) -> array.array:
+        """Collects all numbers to a compact array.array of the given typecode and ends the stream"""
+        if self.__collected is not None:
+            return array.array(typecode, self.__collected)
+        return array.array(typecode, self)
+
+    def collect_numpy(self, dtype: any = float):
+        """
+        Collects all items to a NumPy array of the given dtype and ends the stream.
+        The array is preallocated when the number of items is known.
+        """
+        import numpy
+
+        size = self.__size()
+        if self.__collected is not None:
+            return numpy.fromiter(self.__collected, dtype=dtype, count=size)
+        return numpy.fromiter(self, dtype=dtype, count=size)
+
+    def collect_bytes(self) -> bytes:
+        """Concatenates all bytes-like items to bytes and ends the stream"""
+        if self.__collected is not None:
+            return b"".join(self.__collected)
+        buffer = bytearray()
+        for x in self:
+            buffer += x
+        return bytes(buffer)
+
     def __getitem__(self, index: int) -> Opt[T]:
         collection = self.collect()
         if 0 <= index < len(collection):
@@ -313,28 +1382,121 @@ class Stream(Iterator[T]):
         copy.reverse()
         return Stream[T](copy)
 
-    def reduce(self, cb: Reducer) -> Opt[R]:
-        try:
-            return Opt(functools.reduce(cb, self))
-        except TypeError:
-            return Opt(None)
+    def reduce(
+        self,
+        cb: Reducer,
+        parallel: bool = False,
+        combiner: Reducer = None,
+        identity: any = _MISSING,
+        chunk_size: int = 10000,
+        executor: Executor = None,
+    ) -> Opt[R]:
+        """
+        Reduces all items and ends the stream. The result is absent for empty streams without identity.
+        With parallel, chunks of items are reduced starting from identity by the executor, which defaults
+        to a process pool, and the partial results are combined in a tree by the combiner, which defaults to cb.
+        Both must be associative and picklable for process pools.
+        Starting a process pool and pickling the items costs more than cheap reducers like addition save,
+        so parallel only pays off for expensive reducers or with an executor that is reused across calls.
+        """
+        if parallel:
+            partials = self.__reduce_chunks(functools.partial(_reduce_chunk, cb, identity), chunk_size, executor)
+            return self.__combine(partials, combiner or cb, identity)
+
+        if identity is not _MISSING:
+            return Opt(functools.reduce(cb, self, identity))
+        first = next(self, _MISSING)
+        if first is _MISSING:
+            return EmptyOpt()
+        return Opt(functools.reduce(cb, self, first))
 
-    def sum(self) -> Opt[T]:
-        """Sums all numbers and ends the stream"""
-        return self.reduce(lambda x, y: x + y)
+    def __reduce_chunks(self, reducer: Callable[[List[T]], R], chunk_size: int, executor: Executor = None) -> List[R]:
+        if executor is None:
+            with ProcessPoolExecutor() as executor:
+                return self.__reduce_chunks(reducer, chunk_size, executor)
 
-    def max(self) -> Opt[T]:
-        return self.reduce(lambda x, y: x if x > y else y)
+        # Only a bounded window of chunks is submitted, so the stream is not read and pickled up front
+        max_in_flight = 2 * (os.cpu_count() or 1)
+        in_flight = deque()
+        partials = []
+        try:
+            for chunk in self.batch(chunk_size):
+                if len(in_flight) >= max_in_flight:
+                    partials.append(in_flight.popleft().result())
+                in_flight.append(executor.submit(reducer, chunk))
+            while in_flight:
+                partials.append(in_flight.popleft().result())
+        finally:
+            for future in in_flight:
+                future.cancel()
+        return partials
 
-    def min(self) -> Opt[T]:
-        return self.reduce(lambda x, y: x if x < y else y)
+    @staticmethod
+    def __combine(partials: List[R], combiner: Reducer, identity: any = _MISSING) -> Opt[R]:
+        if not partials:
+            return EmptyOpt() if identity is _MISSING else Opt(identity)
+        while len(partials) > 1:
+            combined = [combiner(partials[i], partials[i + 1]) for i in range(0, len(partials) - 1, 2)]
+            if len(partials) % 2 == 1:
+                combined.append(partials[-1])
+            partials = combined
+        return Opt(partials[0])
+
+    def sum(self, parallel: bool = False, chunk_size: int = 10000, executor: Executor = None) -> Opt[T]:
+        """Sums all numbers and ends the stream"""
+        return self.reduce(_add, parallel=parallel, chunk_size=chunk_size, executor=executor)
+
+    def max(self, parallel: bool = False, chunk_size: int = 10000, executor: Executor = None) -> Opt[T]:
+        return self.reduce(_max, parallel=parallel, chunk_size=chunk_size, executor=executor)
+
+    def min(self, parallel: bool = False, chunk_size: int = 10000, executor: Executor = None) -> Opt[T]:
+        return self.reduce(_min, parallel=parallel, chunk_size=chunk_size, executor=executor)
+
+    def aggregate(self, copy: bool = True, /, **collectors: Collector) -> Dict[str, any]:
+        """
+        Passes every item to all collectors in a single pass, ends the stream and returns their results by name.
+        Example: aggregate(total=Sum(), n=Count(), groups=GroupBy(F("type"), Count()))
+        The collectors are copied, unless the positional copy flag is False, which feeds the given collectors,
+        for example to include them in the state of checkpoints.
+        """
+        if copy:
+            collectors = {name: deepcopy(collector) for name, collector in collectors.items()}
+        adders = [collector.add for collector in collectors.values()]
+        for x in self:
+            for add in adders:
+                add(x)
+        return {name: collector.result() for name, collector in collectors.items()}
+
+    def stats(self) -> Stats:
+        """Computes count, mean, variance, min and max in one pass with constant memory and ends the stream"""
+        stats = Stats()
+        for x in self:
+            stats.add(x)
+        return stats
+
+    def quantiles(self, qs: Iterable[float], approx: bool = True, k: int = 200) -> Opt[List[T]]:
+        """
+        Computes the given quantiles like [0.5, 0.99] and ends the stream.
+        With approx, a QuantileSketch of accuracy k is used instead of sorting all items.
+        """
+        qs = list(qs)
+        if approx:
+            sketch = QuantileSketch(k)
+            for x in self:
+                sketch.add(x)
+            return Opt(sketch.quantiles(qs)) if sketch.count > 0 else EmptyOpt()
+
+        items = sorted(self)
+        if not items:
+            return EmptyOpt()
+        return Opt([items[min(len(items) - 1, max(0, math.ceil(q * len(items)) - 1))] for q in qs])
 
     def limit(self, limit: int):
-        def __limit():
-            for i in range(limit):
-                yield self.__next__()
+        return Stream[T](itertools.islice(self, limit))
 
-        return Stream[T](__limit())
+    def apply(self, pipeline: "Pipeline[T, R]") -> "Stream[R]":
+        """Applies the operations of a Pipeline to this stream"""
+        return pipeline(self)
 
     def concat(self, *iterables):
         iterators = [self]
@@ -345,3 +1507,196 @@ class Stream(Iterator[T]):
 
     def find(self, predicate: Predicate[T]) -> Opt[T]:
         return self.filter(predicate).next()
+
+    def sample(self, k: int, seed: int = None) -> "Stream[T]":
+        """
+        Draws a uniform random sample of up to k items with a single pass and O(k) memory and ends the stream.
+        Uses reservoir sampling with skipping (Algorithm L), so most items are not touched by the random generator.
+        """
+        if k < 0:
+            raise ValueError("k must not be negative")
+        rng = random.Random(seed)
+        reservoir = list(itertools.islice(self, k))
+        if k == 0 or len(reservoir) < k:
+            return Stream[T](reservoir)
+
+        def __uniform():
+            u = rng.random()
+            while u == 0.0:
+                u = rng.random()
+            return u
+
+        weight = math.exp(math.log(__uniform()) / k)
+        while True:
+            skip = math.floor(math.log(__uniform()) / math.log(1 - weight))
+            item = next(itertools.islice(self, skip, skip + 1), _MISSING)
+            if item is _MISSING:
+                break
+            reservoir[rng.randrange(k)] = item
+            weight *= math.exp(math.log(__uniform()) / k)
+        return Stream[T](reservoir)
+
+    def sample_fraction(self, p: float, seed: int = None) -> "Stream[T]":
+        """Lazily keeps each item with the probability p (Bernoulli sampling)"""
+        if not 0 <= p <= 1:
+            raise ValueError("p must be between 0 and 1")
+        rng = random.Random(seed)
+        return Stream[T](filter(lambda x: rng.random() < p, self))
+
+    def sample_by(self, key: Callable[[T], K], k: int, seed: int = None) -> Dict[K, List[T]]:
+        """Draws a uniform random sample of up to k items per key (stratified sampling) and ends the stream"""
+        if k < 0:
+            raise ValueError("k must not be negative")
+        if isinstance(key, Expr):
+            key = key.compile()
+        rng = random.Random(seed)
+        reservoirs: Dict[K, List[T]] = {}
+        counts: Dict[K, int] = {}
+        for x in self:
+            group = key(x)
+            count = counts.get(group, 0) + 1
+            counts[group] = count
+            reservoir = reservoirs.setdefault(group, [])
+            if count <= k:
+                reservoir.append(x)
+            else:
+                index = rng.randrange(count)
+                if index < k:
+                    reservoir[index] = x
+        return reservoirs
+
+    def batch(self, size: int) -> "Stream[List[T]]":
+        """Groups the items to lists of the given size, while the last list may be smaller"""
+        if size < 1:
+            raise ValueError("size must be greater than 0")
+
+        def __batch():
+            while True:
+                items = list(itertools.islice(self, size))
+                if not items:
+                    return
+                yield items
+
+        return Stream[List[T]](__batch())
+
+    def for_each_batch(self, consumer: Consumer[List[T]], size: int = 100, max_in_flight: int = 1):
+        """
+        Passes the items in batches of the given size to the consumer and ends the stream.
+        Up to max_in_flight batches are consumed concurrently in threads, while reading the upstream is paused.
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be greater than 0")
+        if max_in_flight == 1:
+            for items in self.batch(size):
+                consumer(items)
+            return
+
+        in_flight = deque()
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            try:
+                for items in self.batch(size):
+                    if len(in_flight) >= max_in_flight:
+                        in_flight.popleft().result()
+                    in_flight.append(executor.submit(consumer, items))
+                while in_flight:
+                    in_flight.popleft().result()
+            finally:
+                for future in in_flight:
+                    future.cancel()
+
+    async def for_each_batch_async(
+        self,
+        consumer: Callable[[List[T]], Awaitable[None]],
+        size: int = 100,
+        max_in_flight: int = 1,
+    ):
+        """
+        Passes the items in batches of the given size to the async consumer and ends the stream.
+        Up to max_in_flight batches are awaited concurrently, while reading the upstream is paused.
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be greater than 0")
+        in_flight = set()
+        try:
+            for items in self.batch(size):
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        task.result()
+                in_flight.add(asyncio.ensure_future(consumer(items)))
+            while in_flight:
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    task.result()
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+
+class Pipeline(Generic[T, R]):
+    """
+    Reusable and picklable template of stream operations without a source.
+    Example: pipeline = Pipeline().map_key("user").filter(F("age") > 30)
+             pipeline(source) or Stream(source).apply(pipeline)
+    """
+    def __init__(self, steps: Tuple[Tuple[str, tuple, dict], ...] = ()):
+        self.__steps = steps
+
+    def __step(self, name: str, *args, **kwargs) -> "Pipeline":
+        return Pipeline(self.__steps + ((name, args, kwargs),))
+
+    @property
+    def steps(self) -> Tuple[Tuple[str, tuple, dict], ...]:
+        return self.__steps
+
+    def __call__(self, source: Iterable[T]) -> Stream[R]:
+        stream = source if isinstance(source, Stream) else Stream[T](source)
+        for name, args, kwargs in self.__steps:
+            stream = getattr(stream, name)(*args, **kwargs)
+        return stream
+
+    def __len__(self):
+        return len(self.__steps)
+
+    def map(self, mapper: Mapper[T, R], cache: Cache = None, cache_key: Callable[[T], any] = None) -> "Pipeline":
+        return self.__step("map", mapper, cache=cache, cache_key=cache_key)
+
+    def map_kwargs(self, mapper: Type[R]) -> "Pipeline":
+        return self.__step("map_kwargs", mapper)
+
+    def map_key(self, key: Key) -> "Pipeline":
+        return self.__step("map_key", key)
+
+    def kmap(self, key: Key) -> "Pipeline":
+        """This is an alias for map_key"""
+        return self.map_key(key)
+
+    def map_keys(self, *iterables) -> "Pipeline":
+        return self.__step("map_keys", *iterables)
+
+    def filter(self, predicate: Predicate[T]) -> "Pipeline":
+        return self.__step("filter", predicate)
+
+    def filter_key(self, key: Key, invert: bool = False) -> "Pipeline":
+        return self.__step("filter_key", key, invert)
+
+    def filter_key_value(self, key: Key, value: any) -> "Pipeline":
+        return self.__step("filter_key_value", key, value)
+
+    def filter_type(self, typehint: Type[R]) -> "Pipeline":
+        return self.__step("filter_type", typehint)
+
+    def flatmap(self, mapper: FlatMapper[T, R] = None) -> "Pipeline":
+        return self.__step("flatmap", mapper)
+
+    def peek(self, consumer: Consumer[T]) -> "Pipeline":
+        return self.__step("peek", consumer)
+
+    def limit(self, limit: int) -> "Pipeline":
+        return self.__step("limit", limit)
+
+    def unpack(self, format: str | struct.Struct) -> "Pipeline":
+        return self.__step("unpack", format)
+
+    def batch(self, size: int) -> "Pipeline":
+        return self.__step("batch", size)